@@ -1,20 +1,160 @@
 import asyncio
-import requests
+import functools
+import hashlib
+import importlib.util
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+import orjson
 import rigging as rg
 from rigging import logging, logger
 from rich import print
 
 logger.enable("rigging")
 
+# tool descriptors are cached on disk for a few minutes to skip the round-trip on repeated runs
+CACHE_PATH = Path("~/.cache/robopages").expanduser()
+CACHE_TTL = 300
+
+# plaintext HTTP/2 multiplexes concurrent tool calls on a single connection, it's opt-in because it
+# needs the h2 package (pip install "httpx[http2]") and a server accepting h2c, like `robopages serve`
+USE_HTTP2 = os.environ.get("ROBOPAGES_HTTP2", "").lower() in ("1", "true")
+if USE_HTTP2 and importlib.util.find_spec("h2") is None:
+    logger.warning(
+        'ROBOPAGES_HTTP2 is set but h2 is not installed (pip install "httpx[http2]"), using HTTP/1.1'
+    )
+    USE_HTTP2 = False
+
+# maximum number of targets processed concurrently, keeps us within the model rate limits
+MAX_CONCURRENT_TARGETS = 8
+
 try:
-    target = input("Enter the target IP address or domain: ").strip()
-    if not target:  # Check for empty string
-        target = "127.0.0.1"
-        logger.info(f"Defaulting to target: {target}")
+    targets = [
+        t.strip()
+        for t in input("Enter the target IP addresses or domains (comma separated): ").split(",")
+        if t.strip()
+    ]
+    if not targets:  # Check for empty input
+        targets = ["127.0.0.1"]
+        logger.info(f"Defaulting to targets: {targets}")
 except Exception as e:
     logger.error(f"Error reading input: {e}")
-    target = "127.0.0.1"
-    logger.info(f"Falling back to default target: {target}")
+    targets = ["127.0.0.1"]
+    logger.info(f"Falling back to default targets: {targets}")
+
+# the /process endpoint accepts a list of calls, so tool calls issued close together by concurrent
+# pipelines are sent as one request. Rigging runs the tools of a pipeline one at a time, so a batch
+# never holds more calls than there are pipelines: max_size should be set to that number, with a
+# single pipeline every call is sent right away. Batching isn't free, the first call of a batch
+# waits up to max_wait for the others and all of them only return once the slowest is done.
+
+
+class CallBatcher:
+    def __init__(self, client: httpx.Client, max_size: int = 16, max_wait: float = 0.005):
+        self.client = client
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.queue: queue.Queue = queue.Queue()
+        self.flushes = ThreadPoolExecutor()
+        self.worker = threading.Thread(target=self._collect, daemon=True)
+        self.worker.start()
+
+    def call(self, func_name: str, arguments: dict) -> str:
+        # Rigging executes tools synchronously, so block until our batch has been processed
+        future: Future = Future()
+        self.queue.put((func_name, arguments, future))
+        return future.result()
+
+    def close(self):
+        self.queue.put(None)
+        self.worker.join()
+        self.flushes.shutdown(wait=True)
+
+    def _collect(self):
+        closed = False
+        while not closed:
+            # wait for the first call, then give the others a few ms to join the batch
+            item = self.queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closed = True
+                    break
+                batch.append(item)
+
+            self.flushes.submit(self._flush, batch)
+
+    def _flush(self, batch: list):
+        # skip calls whose caller already gave up on them
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+
+        try:
+            results = self._process(batch)
+        except Exception as e:
+            # the server runs every call of the batch before rejecting it because one of them
+            # failed, so the calls must not be sent again: they all get the server's error
+            for _, _, future in batch:
+                _resolve(future, exception=e)
+            return
+
+        for call_id, (func_name, _, future) in enumerate(batch):
+            if str(call_id) in results:
+                _resolve(future, result=results[str(call_id)])
+            else:
+                _resolve(future, exception=RuntimeError(f"no result returned for {func_name}"))
+
+    def _process(self, batch: list) -> dict[str, str]:
+        response = self.client.post(
+            "/process",
+            content=orjson.dumps(
+                [
+                    {
+                        # the server echoes the id as call_id, used to match results to calls
+                        "id": str(call_id),
+                        "type": "function",
+                        "function": {
+                            "name": func_name,
+                            "arguments": arguments,
+                        },
+                    }
+                    for call_id, (func_name, arguments, _) in enumerate(batch)
+                ]
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+        if response.is_error:
+            raise RuntimeError(f"robopages returned {response.status_code}: {response.text}")
+
+        return {result["call_id"]: result["content"] for result in orjson.loads(response.content)}
+
+
+def _resolve(future: Future, result=None, exception: Exception | None = None):
+    # the future might have been cancelled in the meantime, setting it again would raise
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
 
 # we need to wrap the tools in a class that Rigging can understand
 
@@ -24,40 +164,35 @@ class Wrapper(rg.Tool):
     name = "_"
     description = "_"
 
-    def __init__(self, tool: dict):
+    def __init__(self, tool: dict, batcher: CallBatcher):
         self.tool = tool
+        self.batcher = batcher
         self.name = tool["name"]
         self.description = tool["description"]
 
         # declare dynamically the functions by their name
+        # NOTE: the name is bound at definition time, a closure would see the last one of the loop
         for function in tool["functions"]:
             setattr(
                 Wrapper,
                 function["name"],
-                lambda self, *args, **kwargs: self._execute_function(
-                    function["name"], *args, **kwargs
-                ),
+                functools.partialmethod(Wrapper._execute_function, function["name"]),
             )
 
     def _execute_function(self, func_name: str, *args, **kwargs):
         print(f"executing {self.name}.{func_name}{kwargs} ...")
-        # execute the call via robopages and return the result to Rigging
-        return requests.post(
-            "http://localhost:8000/process",
-            json=[
-                {
-                    "type": "function",
-                    "function": {
-                        "name": func_name,
-                        "arguments": kwargs,
-                    },
-                }
-            ],
-        ).json()[0]["content"]
+        # execute the call via robopages and return the result to Rigging,
+        # native tools are called synchronously so this must not be a coroutine
+        return self.batcher.call(func_name, kwargs)
 
     def get_description(self) -> rg.tool.ToolDescription:
         """Creates a full description of the tool for use in prompting"""
 
+        return self.description_obj
+
+    @functools.cached_property
+    def description_obj(self) -> rg.tool.ToolDescription:
+        # self.tool never changes, so the description is only built once per instance
         return rg.tool.ToolDescription(
             name=self.name,
             description=self.description,
@@ -79,47 +214,111 @@ class Wrapper(rg.Tool):
         )
 
 
-async def run(model: str):
-    # get the tools from the Robopages server and wrap each function for Rigging
-    tools = [
-        Wrapper(tool)
-        for tool in requests.get("http://localhost:8000/?flavor=rigging").json()
-    ]
+def fetch_tools(client: httpx.Client) -> list[dict]:
+    url = str(client.base_url.join("/?flavor=rigging"))
+    # key by server url so different servers don't collide
+    cache_file = CACHE_PATH / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
 
-    # First LLM - Command Generator
-    command_chat = (
-        await rg.get_generator(model)
-        .chat(f"Find open ports on \"{target}\" and include all results.")
-        .using(*tools, force=True)
-        .run()
-    )
+    try:
+        if time.time() - cache_file.stat().st_mtime < CACHE_TTL:
+            return orjson.loads(cache_file.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        pass
+
+    response = client.get(url)
+    response.raise_for_status()
+    tools = orjson.loads(response.content)
+
+    try:
+        CACHE_PATH.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(orjson.dumps(tools))
+    except OSError as e:
+        logger.warning(f"Could not cache tools to {cache_file}: {e}")
 
-    command_response = command_chat.last.content
-    print("\nCommand Output:", command_response)
+    return tools
 
-    print("\nRunning Security Evaluation generator...")
 
-    # Second LLM - Security Evaluator
+async def run(model: str, targets: list[str]):
+    # share a single keep-alive connection pool with the Robopages server across all tool calls
+    with httpx.Client(
+        base_url="http://localhost:8000",
+        # httpx only speaks plaintext HTTP/2 with prior knowledge, so HTTP/1.1 must be disabled for it
+        http1=not USE_HTTP2,
+        http2=USE_HTTP2,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        # tool calls run commands on the server side and can take a while to complete
+        timeout=httpx.Timeout(30.0, read=None),
+    ) as client:
+        batcher = CallBatcher(client, max_size=min(len(targets), MAX_CONCURRENT_TARGETS))
+        try:
+            await run_with_client(model, targets, client, batcher)
+        finally:
+            batcher.close()
+
+
+async def run_with_client(
+    model: str, targets: list[str], client: httpx.Client, batcher: CallBatcher
+):
+    # get the tools from the Robopages server and wrap each function for Rigging
+    tools = [Wrapper(tool, batcher) for tool in fetch_tools(client)]
+
+    # system prompt for the Security Evaluator
     system_prompt = """You are a penetration testing expert.
     Analyze the output of security results and use the available tools to achieve exploitation. If a robopage is not available, provide the relevant terminal/docker command."""
 
-    # Include system message as part of the chat prompt
-    analysis_prompt = f"""System: {system_prompt}
+    async def pipeline(target: str) -> tuple[str, str]:
+        generator = rg.get_generator(model)
+
+        # First LLM - Command Generator
+        command_chat = (
+            await generator.chat(f"Find open ports on \"{target}\" and include all results.")
+            .using(*tools, force=True)
+            .run()
+        )
+
+        command_response = command_chat.last.content
+
+        print(f"\nRunning Security Evaluation generator for {target}...")
+
+        # Include system message as part of the chat prompt
+        analysis_prompt = f"""System: {system_prompt}
 
 Command Output to Analyze:
 {command_response}
 
 Please provide your analysis:"""
 
-    pentest_evaluator = (
-        await rg.get_generator(model)
-        .chat(analysis_prompt)
-        .using(*tools, force=True)
-        .run()
-    )
+        # Second LLM - Security Evaluator, only depends on this target's command output
+        pentest_evaluator = (
+            await generator.chat(analysis_prompt).using(*tools, force=True).run()
+        )
+
+        return command_response, pentest_evaluator.last.content
+
+    def run_pipeline(target: str) -> tuple[str, str]:
+        return asyncio.run(pipeline(target))
+
+    # targets are independent, but Rigging calls tools synchronously and that would block
+    # a shared event loop, so each pipeline runs on its own thread with its own event loop
+    # and their tool calls end up in the same batches
+    loop = asyncio.get_running_loop()
+    # leaving the pool waits for every pipeline, so the batcher is never closed under them
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_TARGETS) as pool:
+        results = await asyncio.gather(
+            *(loop.run_in_executor(pool, run_pipeline, target) for target in targets),
+            return_exceptions=True,
+        )
+
+    for target, result in zip(targets, results):
+        if isinstance(result, BaseException):
+            print(f"\nPipeline for {target} failed: {result!r}")
+            continue
+
+        command_response, evaluation = result
+        print(f"\nCommand Output for {target}:", command_response)
+        print(f"\nSecurity Evaluation for {target}:")
+        print(evaluation)
 
-    print("\nSecurity Evaluation:")
-    print(pentest_evaluator.last.content)
 
 if __name__ == "__main__":
-    asyncio.run(run("gpt-4"))
+    asyncio.run(run("gpt-4", targets))
@@ -0,0 +1,210 @@
+use std::{
+    collections::hash_map::DefaultHasher,
+    hash::{Hash, Hasher},
+    io::{BufWriter, Write},
+    time::UNIX_EPOCH,
+};
+
+use camino::{Utf8Path, Utf8PathBuf};
+use serde::{Deserialize, Serialize};
+
+use super::Book;
+
+const DEFAULT_CACHE_PATH: &str = "~/.cache/robopages/";
+
+// identifies the set of pages a book was parsed from, if any of them is added,
+// removed or modified the fingerprint changes and the cached book is discarded
+#[derive(Debug, PartialEq, Serialize, Deserialize)]
+struct Fingerprint {
+    version: String,
+    path: Utf8PathBuf,
+    filter: Option<String>,
+    pages: Vec<(Utf8PathBuf, u128, u64)>,
+}
+
+impl Fingerprint {
+    fn new(
+        path: &Utf8Path,
+        filter: &Option<String>,
+        page_paths: &[Utf8PathBuf],
+    ) -> anyhow::Result<Self> {
+        let mut pages = Vec::with_capacity(page_paths.len());
+        for page_path in page_paths {
+            let metadata = std::fs::metadata(page_path)?;
+            let mtime = metadata.modified()?.duration_since(UNIX_EPOCH)?.as_nanos();
+            pages.push((page_path.clone(), mtime, metadata.len()));
+        }
+
+        Ok(Self {
+            version: env!("CARGO_PKG_VERSION").to_string(),
+            path: path.to_path_buf(),
+            filter: filter.clone(),
+            pages,
+        })
+    }
+
+    fn file_name(&self) -> String {
+        // only used to keep different paths and filters apart, the full fingerprint
+        // is stored in the file and compared on load
+        let mut hasher = DefaultHasher::new();
+        self.path.hash(&mut hasher);
+        self.filter.hash(&mut hasher);
+        format!("book-{:016x}.json", hasher.finish())
+    }
+}
+
+pub(super) fn default_path() -> anyhow::Result<Utf8PathBuf> {
+    Ok(Utf8PathBuf::from(
+        shellexpand::full(DEFAULT_CACHE_PATH)
+            .map_err(|e| anyhow::anyhow!("failed to expand path: {}", e))?
+            .into_owned(),
+    ))
+}
+
+fn load(cache_file: &Utf8Path, fingerprint: &Fingerprint) -> Option<Book> {
+    let data = std::fs::read(cache_file).ok()?;
+    match serde_json::from_slice::<(Fingerprint, Book)>(&data) {
+        Ok((cached, book)) if cached == *fingerprint => Some(book),
+        Ok(_) => {
+            log::debug!("cached book {:?} is stale", cache_file);
+            None
+        }
+        Err(e) => {
+            log::debug!("error while reading cached book {:?}: {}", cache_file, e);
+            None
+        }
+    }
+}
+
+fn store(cache_file: &Utf8Path, fingerprint: &Fingerprint, book: &Book) -> anyhow::Result<()> {
+    if let Some(parent) = cache_file.parent() {
+        std::fs::create_dir_all(parent)?;
+    }
+
+    // write to a temporary file first so that concurrent invocations never read a partial cache
+    let temp_file = tempfile::NamedTempFile::new_in(cache_file.parent().unwrap_or(cache_file))?;
+    {
+        let mut writer = BufWriter::new(temp_file.as_file());
+        serde_json::to_writer(&mut writer, &(fingerprint, book))?;
+        writer.flush()?;
+    }
+    temp_file.persist(cache_file)?;
+
+    Ok(())
+}
+
+pub(super) fn load_or_parse(
+    cache_path: &Utf8Path,
+    path: &Utf8PathBuf,
+    filter: &Option<String>,
+    page_paths: Vec<Utf8PathBuf>,
+) -> anyhow::Result<Book> {
+    let fingerprint = match Fingerprint::new(path, filter, &page_paths) {
+        Ok(fingerprint) => fingerprint,
+        Err(e) => {
+            // not being able to use the cache is not an error, just parse the pages
+            log::debug!("can't fingerprint pages, skipping cache: {}", e);
+            return Book::load_pages(path, page_paths);
+        }
+    };
+    let cache_file = cache_path.join(fingerprint.file_name());
+
+    if let Some(book) = load(&cache_file, &fingerprint) {
+        log::debug!("loaded {} pages from {:?}", book.size(), cache_file);
+        return Ok(book);
+    }
+
+    let book = Book::load_pages(path, page_paths)?;
+
+    // failing to cache is not an error, we'll just parse the pages again next time
+    if let Err(e) = store(&cache_file, &fingerprint, &book) {
+        log::debug!("error while caching book to {:?}: {}", cache_file, e);
+    }
+
+    Ok(book)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::fs;
+    use tempfile::TempDir;
+
+    const PAGE: &str = r#"
+description: A page
+categories: [test]
+functions:
+  function1:
+    description: A function
+    parameters: {}
+    cmdline: [echo, test]
+"#;
+
+    fn find_and_load(cache_path: &Utf8Path, pages_path: &Utf8Path) -> Book {
+        let (path, page_paths) = Book::find_pages(pages_path.to_path_buf(), &None).unwrap();
+        load_or_parse(cache_path, &path, &None, page_paths).unwrap()
+    }
+
+    #[test]
+    fn test_load_or_parse_uses_cache_until_pages_change() {
+        let cache_dir = TempDir::with_prefix("robopage-cache-").unwrap();
+        let pages_dir = TempDir::with_prefix("robopage-test-").unwrap();
+        let cache_path = Utf8Path::from_path(cache_dir.path()).unwrap();
+        let pages_path = Utf8Path::from_path(pages_dir.path()).unwrap();
+
+        fs::write(pages_path.join("page1.yml"), PAGE).unwrap();
+
+        let book = find_and_load(cache_path, pages_path);
+        assert_eq!(book.size(), 1);
+        assert_eq!(fs::read_dir(cache_path).unwrap().count(), 1);
+
+        // served from the cache
+        let (path, page_paths) = Book::find_pages(pages_path.to_path_buf(), &None).unwrap();
+        let fingerprint = Fingerprint::new(&path, &None, &page_paths).unwrap();
+        let book = load(&cache_path.join(fingerprint.file_name()), &fingerprint).unwrap();
+        assert_eq!(book.size(), 1);
+        assert!(book.get_function("function1").is_ok());
+
+        // a new page invalidates the cache
+        fs::write(
+            pages_path.join("page2.yml"),
+            PAGE.replace("function1", "function2"),
+        )
+        .unwrap();
+
+        let book = find_and_load(cache_path, pages_path);
+        assert_eq!(book.size(), 2);
+        assert!(book.get_function("function2").is_ok());
+    }
+
+    #[test]
+    fn test_load_only_returns_book_for_same_fingerprint() {
+        let cache_dir = TempDir::with_prefix("robopage-cache-").unwrap();
+        let pages_dir = TempDir::with_prefix("robopage-test-").unwrap();
+        let cache_path = Utf8Path::from_path(cache_dir.path()).unwrap();
+        let pages_path = Utf8Path::from_path(pages_dir.path()).unwrap();
+
+        fs::write(pages_path.join("page1.yml"), PAGE).unwrap();
+
+        let (path, page_paths) = Book::find_pages(pages_path.to_path_buf(), &None).unwrap();
+        let fingerprint = Fingerprint::new(&path, &None, &page_paths).unwrap();
+        let cache_file = cache_path.join(fingerprint.file_name());
+        let book = Book::load_pages(&path, page_paths.clone()).unwrap();
+
+        assert!(load(&cache_file, &fingerprint).is_none());
+
+        store(&cache_file, &fingerprint, &book).unwrap();
+        let cached = load(&cache_file, &fingerprint).unwrap();
+        assert_eq!(cached.size(), 1);
+        assert!(cached.get_function("function1").is_ok());
+
+        // a page with a different mtime or size makes the cached book stale
+        let mut modified = Fingerprint::new(&path, &None, &page_paths).unwrap();
+        modified.pages[0].1 += 1;
+        assert!(load(&cache_file, &modified).is_none());
+
+        let mut resized = Fingerprint::new(&path, &None, &page_paths).unwrap();
+        resized.pages[0].2 += 1;
+        assert!(load(&cache_file, &resized).is_none());
+    }
+}
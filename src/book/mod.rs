@@ -6,6 +6,7 @@ use serde::{Deserialize, Serialize};
 
 use crate::runtime::{CommandLine, ContainerSource};
 
+mod cache;
 pub(crate) mod flavors;
 pub(crate) mod runtime;
 pub(crate) mod templates;
@@ -168,6 +169,11 @@ pub struct Page {
 
 impl Page {
     fn preprocess(path: &Utf8PathBuf, text: String) -> anyhow::Result<String> {
+        // most pages don't use ${cwd}, skip the extra syscall and copy of the text
+        if !text.contains("${cwd}") {
+            return Ok(text);
+        }
+
         let path = path.canonicalize_utf8()?;
         let base_path = path.parent().unwrap();
 
@@ -185,13 +191,34 @@ impl Page {
     }
 }
 
-#[derive(Debug)]
+#[derive(Debug, Serialize, Deserialize)]
 pub struct Book {
     pub pages: BTreeMap<Utf8PathBuf, Page>,
 }
 
 impl Book {
     pub fn from_path(path: Utf8PathBuf, filter: Option<String>) -> anyhow::Result<Self> {
+        let (path, page_paths) = Self::find_pages(path, &filter)?;
+        Self::load_pages(&path, page_paths)
+    }
+
+    /// Same as from_path but reuses the book parsed by a previous invocation if none
+    /// of the pages changed since then.
+    pub fn from_path_cached(path: Utf8PathBuf, filter: Option<String>) -> anyhow::Result<Self> {
+        let (path, page_paths) = Self::find_pages(path, &filter)?;
+        match cache::default_path() {
+            Ok(cache_path) => cache::load_or_parse(&cache_path, &path, &filter, page_paths),
+            Err(e) => {
+                log::debug!("can't determine cache path, skipping cache: {}", e);
+                Self::load_pages(&path, page_paths)
+            }
+        }
+    }
+
+    fn find_pages(
+        path: Utf8PathBuf,
+        filter: &Option<String>,
+    ) -> anyhow::Result<(Utf8PathBuf, Vec<Utf8PathBuf>)> {
         log::debug!("Searching for pages in {:?}", path);
         let mut page_paths = Vec::new();
 
@@ -251,6 +278,10 @@ impl Book {
             return Err(anyhow::anyhow!("no pages found in {:?}", path));
         }
 
+        Ok((path, page_paths))
+    }
+
+    fn load_pages(path: &Utf8PathBuf, page_paths: Vec<Utf8PathBuf>) -> anyhow::Result<Self> {
         log::debug!("loading {} pages from {:?}", page_paths.len(), path);
 
         let mut pages = BTreeMap::new();
@@ -267,7 +298,7 @@ impl Book {
 
             // if categories are not set, use the path components
             if page.categories.is_empty() {
-                let path_buf = page_path.strip_prefix(&path)?;
+                let path_buf = page_path.strip_prefix(path)?;
                 let parent = path_buf.parent();
 
                 if let Some(parent_path) = parent {
@@ -565,6 +596,73 @@ functions:
         assert!(result.get_function("function2").is_err());
     }
 
+    #[test]
+    fn test_book_filter_skips_parsing_non_matching_pages() {
+        use std::fs;
+        use tempfile::TempDir;
+
+        let temp_dir = TempDir::with_prefix("robopage-test-").unwrap();
+        let base_path = temp_dir.path();
+
+        fs::write(
+            base_path.join("matching.yml"),
+            r#"
+description: Matching page
+categories: [test]
+functions:
+  function1:
+    description: A function
+    parameters: {}
+    cmdline: [echo, test]
+"#,
+        )
+        .unwrap();
+
+        // this would fail to parse, it must be filtered out before being loaded
+        fs::write(base_path.join("other.yml"), "not: [valid").unwrap();
+
+        let result = Book::from_path(
+            Utf8PathBuf::from(base_path.to_str().unwrap()),
+            Some("matching".to_string()),
+        )
+        .unwrap();
+
+        assert_eq!(result.size(), 1);
+        assert!(result.get_function("function1").is_ok());
+    }
+
+    #[test]
+    fn test_page_preprocess_cwd() {
+        use std::fs;
+        use tempfile::TempDir;
+
+        let temp_dir = TempDir::with_prefix("robopage-test-").unwrap();
+        let page_path = Utf8PathBuf::from(temp_dir.path().join("page.yml").to_str().unwrap());
+
+        fs::write(
+            &page_path,
+            r#"
+description: Page using cwd
+functions:
+  function1:
+    description: A function
+    parameters: {}
+    cmdline: [cat, "${cwd}/file.txt"]
+"#,
+        )
+        .unwrap();
+
+        let page = Page::from_path(&page_path).unwrap();
+        let cmdline = page.functions["function1"]
+            .execution
+            .get_command_line()
+            .unwrap();
+
+        let base_path = page_path.canonicalize_utf8().unwrap();
+        let base_path = base_path.parent().unwrap();
+        assert_eq!(cmdline[1], format!("{}/file.txt", base_path));
+    }
+
     #[test]
     fn test_wrap_with_env() {
         let env: BTreeMap<String, String> = {
@@ -1,6 +1,7 @@
 use std::{
+    collections::HashSet,
     fs::File,
-    io::{self, Write},
+    io::{self, BufWriter, Read, Seek, Write},
     path::{Path, PathBuf},
 };
 
@@ -8,12 +9,61 @@ use camino::Utf8PathBuf;
 
 use super::InstallArgs;
 
-fn extract_archive_without_intermediate_folder(
-    mut archive: zip::ZipArchive<File>,
+// archives up to this size are extracted from memory, bigger ones are spooled to a temporary file
+const MAX_IN_MEMORY_ARCHIVE_SIZE: usize = 64 << 20;
+
+// write buffer used for each extracted file
+const EXTRACT_WRITE_BUFFER_SIZE: usize = 256 << 10;
+
+enum DownloadedArchive {
+    InMemory(Vec<u8>),
+    OnDisk(tempfile::NamedTempFile),
+}
+
+async fn download_archive(source: &str) -> anyhow::Result<DownloadedArchive> {
+    let mut response = reqwest::get(source).await?;
+    let mut buffer = Vec::with_capacity(
+        response
+            .content_length()
+            .map_or(0, |len| len as usize)
+            .min(MAX_IN_MEMORY_ARCHIVE_SIZE),
+    );
+    let mut temp_file: Option<tempfile::NamedTempFile> = None;
+
+    while let Some(chunk) = response.chunk().await? {
+        if let Some(file) = temp_file.as_mut() {
+            file.write_all(&chunk)?;
+        } else if buffer.len() + chunk.len() > MAX_IN_MEMORY_ARCHIVE_SIZE {
+            log::debug!(
+                "archive is bigger than {MAX_IN_MEMORY_ARCHIVE_SIZE} bytes, spooling to disk"
+            );
+            let mut file = tempfile::NamedTempFile::new()?;
+            file.write_all(&buffer)?;
+            file.write_all(&chunk)?;
+            buffer = Vec::new();
+            temp_file = Some(file);
+        } else {
+            buffer.extend_from_slice(&chunk);
+        }
+    }
+
+    Ok(match temp_file {
+        Some(file) => DownloadedArchive::OnDisk(file),
+        None => DownloadedArchive::InMemory(buffer),
+    })
+}
+
+fn extract_entries_without_intermediate_folder<R: Read + Seek>(
+    mut archive: zip::ZipArchive<R>,
     target_path: &Path,
+    worker: usize,
+    num_workers: usize,
 ) -> io::Result<()> {
-    // Iterate through each entry in the ZIP archive
-    for i in 0..archive.len() {
+    // keep track of the directories we already created to avoid a syscall per file
+    let mut created_dirs: HashSet<PathBuf> = HashSet::new();
+
+    // Iterate through the entries of the ZIP archive assigned to this worker
+    for i in (worker..archive.len()).step_by(num_workers) {
         let mut file_in_zip = archive.by_index(i)?;
         let file_path = file_in_zip.mangled_name();
 
@@ -28,22 +78,72 @@ fn extract_archive_without_intermediate_folder(
 
         // Create parent directories as needed
         if let Some(parent) = target_file_path.parent() {
-            std::fs::create_dir_all(parent)?;
+            if !created_dirs.contains(parent) {
+                std::fs::create_dir_all(parent)?;
+                created_dirs.insert(parent.to_path_buf());
+            }
         }
 
-        // Write the file to the target path
-        let mut outfile = File::create(&target_file_path)?;
+        // Stream the file to the target path, the size in the zip header can't be trusted so
+        // the entry is never buffered as a whole, but large writes keep the syscalls down
+        let mut outfile =
+            BufWriter::with_capacity(EXTRACT_WRITE_BUFFER_SIZE, File::create(&target_file_path)?);
         io::copy(&mut file_in_zip, &mut outfile)?;
+        outfile.flush()?;
     }
 
     Ok(())
 }
 
-fn extract_archive(archive_path: &Path, target_path: &Path) -> io::Result<()> {
+fn extract_archive_without_intermediate_folder<R, F>(
+    open: &F,
+    num_entries: usize,
+    target_path: &Path,
+) -> io::Result<()>
+where
+    R: Read + Seek,
+    F: Fn() -> io::Result<R> + Sync,
+{
+    let num_workers = std::thread::available_parallelism()
+        .map(|n| n.get())
+        .unwrap_or(1)
+        .clamp(1, num_entries.max(1));
+
+    // a ZipArchive can't be shared between threads, so each worker opens its own
+    // reader on the same data and extracts a subset of the entries
+    std::thread::scope(|scope| {
+        let workers: Vec<_> = (0..num_workers)
+            .map(|worker| {
+                scope.spawn(move || {
+                    extract_entries_without_intermediate_folder(
+                        zip::ZipArchive::new(open()?)?,
+                        target_path,
+                        worker,
+                        num_workers,
+                    )
+                })
+            })
+            .collect();
+
+        workers
+            .into_iter()
+            .map(|handle| {
+                handle
+                    .join()
+                    .unwrap_or_else(|_| Err(io::Error::other("extraction worker panicked")))
+            })
+            .collect()
+    })
+}
+
+fn extract_archive<R, F>(open: F, target_path: &Path) -> io::Result<()>
+where
+    R: Read + Seek,
+    F: Fn() -> io::Result<R> + Sync,
+{
     log::info!("extracting to {:?}", target_path);
 
-    let file = File::open(archive_path)?;
-    let mut archive = zip::ZipArchive::new(file)?;
+    let mut archive = zip::ZipArchive::new(open()?)?;
 
     // check if all files share the same prefix
     let file_names: Vec<_> = archive.file_names().collect();
@@ -62,7 +162,7 @@ fn extract_archive(archive_path: &Path, target_path: &Path) -> io::Result<()> {
     if single_root_folder {
         // if the archive comes from a github repository, it will have a single root folder
         // so we can extract it without the intermediate folder
-        extract_archive_without_intermediate_folder(archive, target_path)?;
+        extract_archive_without_intermediate_folder(&open, archive.len(), target_path)?;
     } else {
         // otherwise, we extract the archive as it is
         archive.extract(target_path)?;
@@ -81,14 +181,18 @@ pub(crate) async fn install(args: InstallArgs) -> anyhow::Result<()> {
         return Err(anyhow::anyhow!("{:?} already exists", path));
     }
 
-    if args.source.ends_with(".zip") {
+    let is_url = args.source.contains("://");
+
+    if args.source.ends_with(".zip") && !is_url {
         // install from zip archive
         log::info!("extracting archive {} to {:?}", &args.source, &path);
         let mut zip = zip::ZipArchive::new(std::fs::File::open(&args.source)?)?;
         zip.extract(path)?;
     } else {
-        // install from github repository
-        let source = if !args.source.contains("://") {
+        // install from zip archive url or github repository
+        let source = if args.source.ends_with(".zip") {
+            args.source.clone()
+        } else if !is_url {
             format!(
                 "https://github.com/{}/archive/refs/heads/main.zip",
                 &args.source
@@ -99,15 +203,14 @@ pub(crate) async fn install(args: InstallArgs) -> anyhow::Result<()> {
 
         log::info!("downloading robopages from {} ...", source);
 
-        let temp_file = tempfile::NamedTempFile::new()?;
-        let mut response = reqwest::get(&source).await?;
-        let mut file = std::fs::File::create(temp_file.path())?;
-
-        while let Some(chunk) = response.chunk().await? {
-            file.write_all(&chunk)?;
+        match download_archive(&source).await? {
+            DownloadedArchive::InMemory(archive) => {
+                extract_archive(|| Ok(io::Cursor::new(&archive[..])), path.as_std_path())?
+            }
+            DownloadedArchive::OnDisk(archive) => {
+                extract_archive(|| File::open(archive.path()), path.as_std_path())?
+            }
         }
-
-        extract_archive(temp_file.path(), path.as_std_path())?;
     }
 
     Ok(())
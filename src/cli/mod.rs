@@ -47,7 +47,7 @@ pub(crate) enum Command {
 
 #[derive(Debug, Args)]
 pub(crate) struct InstallArgs {
-    /// Repository user/name, URL or ZIP archive path.
+    /// Repository user/name, URL, ZIP archive URL or path.
     #[clap(long, short = 'S', default_value = DEFAULT_REPO)]
     source: String,
     /// Destination path.
@@ -92,6 +92,9 @@ pub(crate) struct ServeArgs {
     /// Maximum number of parallel calls to execute. Leave to 0 to use all available cores.
     #[clap(long, default_value = "0")]
     workers: usize,
+    /// Number of HTTP server worker threads. Leave to 0 to use all available cores.
+    #[clap(long, default_value = "0")]
+    http_workers: usize,
     /// Optional SSH connection string, if set commands will be executed over SSH on the given host.
     #[clap(long)]
     ssh: Option<String>,
@@ -20,7 +20,7 @@ pub(crate) async fn run(args: RunArgs) -> anyhow::Result<()> {
         None
     };
 
-    let book = Arc::new(Book::from_path(args.path, None)?);
+    let book = Arc::new(Book::from_path_cached(args.path, None)?);
     let function = book.get_function(&args.function)?;
 
     let mut arguments = BTreeMap::new();
@@ -2,6 +2,7 @@ use std::collections::HashMap;
 use std::sync::Arc;
 
 use actix_cors::Cors;
+use actix_web::http::header::ContentType;
 use actix_web::web;
 use actix_web::App;
 use actix_web::HttpResponse;
@@ -11,7 +12,7 @@ use crate::book::flavors::rigging;
 use crate::book::flavors::Flavor;
 use crate::book::{
     flavors::{nerve, openai},
-    Book,
+    Book, Page,
 };
 use crate::runtime;
 use crate::runtime::ssh::SSHConnection;
@@ -22,6 +23,21 @@ struct AppState {
     max_running_tasks: usize,
     book: Arc<Book>,
     ssh: Option<SSHConnection>,
+    // the book doesn't change while serving, so the unfiltered tools
+    // are serialized once per flavor instead of on every request
+    openai_tools: web::Bytes,
+    nerve_tools: web::Bytes,
+    rigging_tools: web::Bytes,
+}
+
+fn serialize_tools<'a, T>(book: &'a Book) -> anyhow::Result<web::Bytes>
+where
+    T: serde::Serialize,
+    Vec<T>: std::convert::From<&'a Page>,
+{
+    Ok(web::Bytes::from(serde_json::to_vec(
+        &book.as_tools::<T>(None),
+    )?))
 }
 
 async fn not_found() -> actix_web::Result<HttpResponse> {
@@ -36,6 +52,19 @@ async fn serve_pages_impl(
     let flavor = Flavor::from_map_or_default(&query)
         .map_err(|e| actix_web::error::ErrorBadRequest(e.to_string()))?;
 
+    if filter.is_none() {
+        let tools = match flavor {
+            Flavor::Nerve => &state.nerve_tools,
+            Flavor::Rigging => &state.rigging_tools,
+            // default to openai
+            _ => &state.openai_tools,
+        };
+
+        return Ok(HttpResponse::Ok()
+            .content_type(ContentType::json())
+            .body(tools.clone()));
+    }
+
     match flavor {
         Flavor::Nerve => {
             Ok(HttpResponse::Ok().json(state.book.as_tools::<nerve::FunctionGroup>(filter)))
@@ -98,7 +127,7 @@ pub(crate) async fn serve(args: ServeArgs) -> anyhow::Result<()> {
         None
     };
 
-    let book = Arc::new(Book::from_path(args.path, args.filter)?);
+    let book = Arc::new(Book::from_path_cached(args.path, args.filter)?);
     if !args.lazy {
         for page in book.pages.values() {
             for (func_name, func) in page.functions.iter() {
@@ -116,14 +145,23 @@ pub(crate) async fn serve(args: ServeArgs) -> anyhow::Result<()> {
         args.workers
     };
 
+    let http_workers = if args.http_workers == 0 {
+        std::thread::available_parallelism()?.into()
+    } else {
+        args.http_workers
+    };
+
     log::info!(
-        "serving {} pages on http://{} with {max_running_tasks} max running tasks",
+        "serving {} pages on http://{} with {http_workers} http workers and {max_running_tasks} max running tasks",
         book.size(),
         &args.address,
     );
 
     let app_state = Arc::new(AppState {
         max_running_tasks,
+        openai_tools: serialize_tools::<openai::Tool>(&book)?,
+        nerve_tools: serialize_tools::<nerve::FunctionGroup>(&book)?,
+        rigging_tools: serialize_tools::<rigging::Tool>(&book)?,
         book,
         ssh,
     });
@@ -141,7 +179,9 @@ pub(crate) async fn serve(args: ServeArgs) -> anyhow::Result<()> {
             .default_service(web::route().to(not_found))
             .wrap(actix_web::middleware::Logger::default())
     })
-    .bind(&args.address)
+    .workers(http_workers)
+    // accept both HTTP/1.x and plaintext HTTP/2 (h2c) connections
+    .bind_auto_h2c(&args.address)
     .map_err(|e| anyhow!(e))?
     .run()
     .await
@@ -1,27 +1,39 @@
+use std::io::{self, BufWriter, Write};
+
 use crate::book::{runtime::ExecutionFlavor, Book};
 
 use super::ViewArgs;
 
 pub(crate) async fn view(args: ViewArgs) -> anyhow::Result<()> {
-    let book = Book::from_path(args.path, args.filter)?;
+    let book = Book::from_path_cached(args.path, args.filter)?;
+
+    // lock stdout once and buffer the whole output instead of flushing on every line
+    let mut out = BufWriter::new(io::stdout().lock());
 
     for (_, page) in book.pages {
-        println!("{} > [{}]", page.categories.join(" > "), page.name);
+        writeln!(out, "{} > [{}]", page.categories.join(" > "), page.name)?;
 
         for (function_name, function) in page.functions {
-            println!("    * {} : {}", function_name, function.description);
-            println!(
+            writeln!(out, "    * {} : {}", function_name, function.description)?;
+            writeln!(
+                out,
                 "         running with: {}",
                 ExecutionFlavor::for_function(&function)?
-            );
-            println!("         parameters:");
+            )?;
+            writeln!(out, "         parameters:")?;
             for (parameter_name, parameter) in &function.parameters {
-                println!("            {} : {}", parameter_name, parameter.description);
+                writeln!(
+                    out,
+                    "            {} : {}",
+                    parameter_name, parameter.description
+                )?;
             }
 
-            println!();
+            writeln!(out)?;
         }
     }
 
+    out.flush()?;
+
     Ok(())
 }
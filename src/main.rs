@@ -8,8 +8,7 @@ mod runtime;
 use clap::Parser;
 use cli::Arguments;
 
-#[tokio::main]
-async fn main() -> anyhow::Result<()> {
+fn main() -> anyhow::Result<()> {
     let args = Arguments::parse();
 
     if std::env::var_os("RUST_LOG").is_none() {
@@ -23,14 +22,27 @@ async fn main() -> anyhow::Result<()> {
         .format_target(false)
         .init();
 
-    let result = match args.command {
-        cli::Command::Install(args) => cli::install(args).await,
-        cli::Command::Create(args) => cli::create(args).await,
-        cli::Command::View(args) => cli::view(args).await,
-        cli::Command::Serve(args) => cli::serve(args).await,
-        cli::Command::Run(args) => cli::run(args).await,
-        cli::Command::Validate(args) => cli::validate(args).await,
-    };
+    // only serve and run (which may hold an SSH session while prompting) need a worker
+    // thread per core, the other commands don't pay for spawning them at startup
+    let runtime = match args.command {
+        cli::Command::Serve(_) | cli::Command::Run(_) => {
+            tokio::runtime::Builder::new_multi_thread()
+        }
+        _ => tokio::runtime::Builder::new_current_thread(),
+    }
+    .enable_all()
+    .build()?;
+
+    let result = runtime.block_on(async {
+        match args.command {
+            cli::Command::Install(args) => cli::install(args).await,
+            cli::Command::Create(args) => cli::create(args).await,
+            cli::Command::View(args) => cli::view(args).await,
+            cli::Command::Serve(args) => cli::serve(args).await,
+            cli::Command::Run(args) => cli::run(args).await,
+            cli::Command::Validate(args) => cli::validate(args).await,
+        }
+    });
 
     if let Err(e) = result {
         log::error!("{:?}", e);